@@ -1,11 +1,11 @@
 import asyncio
 import logging
 import os
-import re
 from typing import Optional
 from datetime import datetime
 
 from dotenv import load_dotenv
+import openai
 from openai import OpenAI
 
 from livekit import agents
@@ -13,14 +13,20 @@ from livekit.agents import AgentSession, Agent, RoomInputOptions, function_tool,
 from livekit.plugins import openai as lk_openai, noise_cancellation, silero
 
 # For saving files
-from docx import Document
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
+from report_export import (
+    EXPORT_FORMATS,
+    ensure_dir,
+    export_report_bundle,
+    parse_report,
+    render_report,
+    slugify,
+)
 
 import mimetypes
 
 # Google Drive
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaFileUpload
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
@@ -33,6 +39,11 @@ from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request as GRequest
 from google.oauth2.credentials import Credentials as GCredentials
 
+import resilience
+from resilience import CircuitOpenError
+import tool_cache
+from file_data import stored_vector_store_id
+
 load_dotenv()
 
 
@@ -50,10 +61,40 @@ GMAIL_TOKEN_PATH = os.getenv("GMAIL_TOKEN_PATH", r"C:\Users\visha\Downloads\Voic
 # Vector store for File Search (Responses API)
 VECTOR_STORE_ID = os.getenv("VECTOR_STORE_ID")
 
+def _vector_store_id() -> Optional[str]:
+    """VECTOR_STORE_ID from .env, else the store kept up to date by `file_data.py --watch`."""
+    return VECTOR_STORE_ID or stored_vector_store_id()
+
 # Primary & fallback save locations
 SAVE_DIR_PRIMARY = os.getenv("SAVE_DIR", r"C:\Users\visha\Downloads")
 SAVE_DIR_FALLBACK = r"C:\temp"
 
+# Per-endpoint resilience policies. Only idempotent reads are hedged; Drive/Gmail writes
+# are not retried on timeout (the request may have landed), only on HTTP/connection errors.
+# file_search has its own breaker so a stale vector store can't take web search down with it.
+OPENAI_TRANSIENT = (openai.APIConnectionError, openai.APITimeoutError, openai.RateLimitError,
+                    openai.InternalServerError, TimeoutError)
+resilience.configure(
+    "responses", timeout=25.0, retries=2, hedge_percentile=0.95, retry_on=OPENAI_TRANSIENT,
+    fallback="Search is not responding right now. Let's try again in a minute.",
+)
+resilience.configure(
+    "responses.file_search", timeout=25.0, retries=2, hedge_percentile=0.95, retry_on=OPENAI_TRANSIENT,
+    fallback="Searching your notes is not working right now. Let's try again in a minute.",
+)
+resilience.configure(
+    "responses.research", timeout=120.0, retries=1, failure_threshold=3, retry_on=OPENAI_TRANSIENT,
+    fallback="Deep research is unavailable right now. I can try a quick web or file search instead.",
+)
+resilience.configure(
+    "drive", timeout=120.0, retries=1, retry_on=(HttpError, ConnectionError),
+    fallback="Google Drive is not responding right now. Your report is still saved locally.",
+)
+resilience.configure(
+    "gmail", timeout=60.0, retries=0,
+    fallback="Gmail is not responding right now. Your draft is kept; ask me to send it again shortly.",
+)
+
 # Logging noise reduction
 logging.getLogger("livekit.agents").setLevel(logging.WARNING)
 logging.getLogger("livekit.plugins.silero").setLevel(logging.ERROR)
@@ -61,96 +102,39 @@ logging.getLogger("livekit.plugins.silero").setLevel(logging.ERROR)
 
 
 # ---------- Helpers ----------
-def _slugify(s: str) -> str:
-    s = (s or "report").lower()
-    s = re.sub(r"[^a-z0-9]+", "-", s).strip("-")
-    return s[:60] or "report"
-
-def _ensure_dir(path: str):
-    os.makedirs(path, exist_ok=True)
-
-def _save_as_docx(path: str, topic: str, content: str):
-    doc = Document()
-    doc.add_heading(f"Research Report: {topic}", 0)
-    for para in (content or "").split("\n\n"):
-        doc.add_paragraph(para)
-    doc.save(path)
-
-def _save_as_pdf(path: str, topic: str, content: str):
-    c = canvas.Canvas(path, pagesize=letter)
-    width, height = letter
-    margin_x, margin_y = 72, 72  # 1 inch margins
-
-    # Title
-    c.setFont("Helvetica-Bold", 14)
-    c.drawString(margin_x, height - margin_y, f"Research Report: {topic}")
-
-    # Body
-    c.setFont("Helvetica", 11)
-    y = height - margin_y - 24
-    max_chars = 95
-
-    def draw_line(line: str, y_pos: float):
-        c.drawString(margin_x, y_pos, line)
-
-    for raw_line in (content or "").splitlines():
-        line = raw_line
-        if not line:
-            y -= 14
-            if y < margin_y:
-                c.showPage()
-                c.setFont("Helvetica", 11)
-                y = height - margin_y
-            continue
-
-        # naive wrapping
-        while len(line) > max_chars:
-            draw_line(line[:max_chars], y)
-            line = line[max_chars:]
-            y -= 14
-            if y < margin_y:
-                c.showPage()
-                c.setFont("Helvetica", 11)
-                y = height - margin_y
-        draw_line(line, y)
-        y -= 14
-        if y < margin_y:
-            c.showPage()
-            c.setFont("Helvetica", 11)
-            y = height - margin_y
-
-    c.save()
-
 def _save_report_to_file(topic: str, content: str, file_type: str) -> str:
     """Try primary dir; fall back to C:\\temp. Returns the final path."""
-    if file_type not in ("docx", "pdf"):
-        raise ValueError("file_type must be 'docx' or 'pdf'")
+    if file_type not in EXPORT_FORMATS:
+        raise ValueError(f"file_type must be one of {', '.join(EXPORT_FORMATS)}")
 
     timestamp = datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
-    base = f"research_report-{_slugify(topic)}-{timestamp}"
-    filename = base + (".docx" if file_type == "docx" else ".pdf")
+    base = f"research_report-{slugify(topic)}-{timestamp}"
+    filename = f"{base}.{file_type}"
+    report = parse_report(topic, content)
 
     # Try primary
     try:
-        _ensure_dir(SAVE_DIR_PRIMARY)
-        path = os.path.join(SAVE_DIR_PRIMARY, filename)
-        if file_type == "docx":
-            _save_as_docx(path, topic, content)
-        else:
-            _save_as_pdf(path, topic, content)
-        return path
+        ensure_dir(SAVE_DIR_PRIMARY)
+        return render_report(os.path.join(SAVE_DIR_PRIMARY, filename), report, file_type)
     except Exception as e:
         logging.warning("Save failed in %s: %s. Falling back to %s",
                         SAVE_DIR_PRIMARY, e, SAVE_DIR_FALLBACK)
 
     # Fallback
-    _ensure_dir(SAVE_DIR_FALLBACK)
-    path = os.path.join(SAVE_DIR_FALLBACK, filename)
-    if file_type == "docx":
-        _save_as_docx(path, topic, content)
-    else:
-        _save_as_pdf(path, topic, content)
-    return path
+    ensure_dir(SAVE_DIR_FALLBACK)
+    return render_report(os.path.join(SAVE_DIR_FALLBACK, filename), report, file_type)
+
+def _save_report_bundle(topic: str, content: str, formats=EXPORT_FORMATS, make_zip: bool = False) -> dict:
+    """Export all formats into one per-report folder; same primary/fallback dirs as single saves."""
+    try:
+        ensure_dir(SAVE_DIR_PRIMARY)
+        return export_report_bundle(topic, content, SAVE_DIR_PRIMARY, formats, make_zip)
+    except Exception as e:
+        logging.warning("Bundle export failed in %s: %s. Falling back to %s",
+                        SAVE_DIR_PRIMARY, e, SAVE_DIR_FALLBACK)
+
+    ensure_dir(SAVE_DIR_FALLBACK)
+    return export_report_bundle(topic, content, SAVE_DIR_FALLBACK, formats, make_zip)
 
 
 # ---------- Drive integration ----------
@@ -184,15 +168,17 @@ def _guess_mime(file_path: str) -> str:
         return "application/pdf"
     if ext == ".docx":
         return "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+    if ext == ".md":
+        return "text/markdown"
     mt, _ = mimetypes.guess_type(file_path)
     return mt or "application/octet-stream"
 
-def upload_file_to_drive(file_path: str, folder_id: Optional[str] = None) -> dict:
+def upload_file_to_drive(file_path: str, folder_id: Optional[str] = None, service=None) -> dict:
     """Upload local file to Drive. Returns dict with id, webViewLink."""
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"Not found: {file_path}")
 
-    service = _ensure_drive_service()
+    service = service or _ensure_drive_service()
     body = {"name": os.path.basename(file_path)}
     if folder_id:
         body["parents"] = [folder_id]
@@ -206,6 +192,34 @@ def upload_file_to_drive(file_path: str, folder_id: Optional[str] = None) -> dic
     # Request a webViewLink (owner can open immediately). Sharing is not changed.
     return file
 
+def create_drive_folder(name: str, parent_id: Optional[str] = None, service=None) -> dict:
+    """Create a Drive folder. Returns dict with id, name, webViewLink."""
+    service = service or _ensure_drive_service()
+    body = {"name": name, "mimeType": "application/vnd.google-apps.folder"}
+    if parent_id:
+        body["parents"] = [parent_id]
+    return service.files().create(body=body, fields="id, name, webViewLink").execute()
+
+async def upload_bundle_to_drive(file_paths: list, bundle_name: str, folder_id: Optional[str] = None) -> dict:
+    """
+    Upload a whole export bundle into one new Drive folder over one authorized service.
+    The folder and each file are separate resilience calls, so a retry re-sends only the
+    step that failed instead of the whole bundle. Returns the folder metadata plus "files".
+    """
+    missing = [p for p in file_paths if not os.path.exists(p)]
+    if missing:
+        raise FileNotFoundError(f"Not found: {', '.join(missing)}")
+
+    service = await asyncio.to_thread(_ensure_drive_service)
+    folder = await resilience.call("drive", create_drive_folder, bundle_name, folder_id, service)
+
+    # Drive's batch endpoint does not accept media uploads, so files go one by one.
+    files = []
+    for p in file_paths:
+        files.append(await resilience.call("drive", upload_file_to_drive, p, folder["id"], service))
+    folder["files"] = files
+    return folder
+
 #------- for GMAIL ------------
 
 def _ensure_gmail_service():
@@ -273,15 +287,28 @@ Always preview any email you draft and ask for explicit confirmation before send
 If the user confirms with ‘yes’, ‘send it’, ‘go ahead’, etc., call send_email immediately; do not draft again.
 
 No filler; speak decisively.""")
-        self.openai_client = OpenAI()
+        # resilience.call owns retries and deadlines, so the client makes a single attempt bounded
+        # by the endpoint timeout; otherwise timed-out attempts keep holding executor threads.
+        self.openai_client = OpenAI(max_retries=0, timeout=resilience.timeout_for("responses"))
 
         # In-memory buffer for the last generated report
         self._last_report_topic: Optional[str] = None
         self._last_report_content: Optional[str] = None
         self._last_report_format: Optional[str] = None
         self._last_saved_path: Optional[str] = None
+        self._last_bundle: Optional[dict] = None
         self._pending_email = None  # NEW: holds the last composed email dict
+        # Repeated web/file searches this session are answered from here (and reused by deep research)
+        self._tool_memo = tool_cache.SessionMemo()
 
+    async def _responses_text(self, endpoint: str = "responses", **kwargs) -> str:
+        resp = await resilience.call(
+            endpoint, self.openai_client.responses.create, timeout=resilience.timeout_for(endpoint), **kwargs
+        )
+        return resp.output_text or ""
+
+    async def on_exit(self) -> None:
+        logging.info("Tool memo stats: session=%s worker=%s", self._tool_memo.stats, tool_cache.STATS)
 
     # ---- Web search (Responses API tool) ----
     @function_tool(
@@ -289,12 +316,14 @@ No filler; speak decisively.""")
     )
     async def web_search(self, context: RunContext, query: str) -> str:
         try:
-            resp = self.openai_client.responses.create(
+            return await self._tool_memo.run("web_search", query, lambda: self._responses_text(
                 model="gpt-4o-mini",
                 tools=[{"type": "web_search"}],  # per docs
                 input=query,
-            )
-            return resp.output_text or ""
+            ))
+        except CircuitOpenError as e:
+            await context.session.say(e.fallback)
+            return e.fallback
         except Exception as e:
             logging.exception("web_search failed")
             return f"Search error: {e}"
@@ -305,19 +334,22 @@ No filler; speak decisively.""")
         description="Search uploaded cohort/module notes using File Search (vector store)."
     )
     async def file_search(self, context: RunContext, query: str) -> str:
-        if not VECTOR_STORE_ID:
-            return "File search not configured. Set VECTOR_STORE_ID in your .env."
+        vector_store_id = _vector_store_id()
+        if not vector_store_id:
+            return "File search not configured. Set VECTOR_STORE_ID in your .env or run file_data.py."
         try:
-            resp = self.openai_client.responses.create(
+            return await self._tool_memo.run("file_search", query, lambda: self._responses_text(
+                "responses.file_search",
                 model="gpt-4o-mini",
                 tools=[{
                     "type": "file_search",
-                    "vector_store_ids": [VECTOR_STORE_ID],
+                    "vector_store_ids": [vector_store_id],
                 }],
                 input=query,
-            )
-
-            return resp.output_text or ""
+            ), scope=vector_store_id)
+        except CircuitOpenError as e:
+            await context.session.say(e.fallback)
+            return e.fallback
         except Exception as e:
             logging.exception("file_search failed")
             return f"File search error: {e}"
@@ -337,8 +369,9 @@ No filler; speak decisively.""")
         max_sources: int = 6,
         recency_hint: str = "last 30 days",
     ) -> str:
-        if not VECTOR_STORE_ID:
-            return "File search not configured. Set VECTOR_STORE_ID in your .env."
+        vector_store_id = _vector_store_id()
+        if not vector_store_id:
+            return "File search not configured. Set VECTOR_STORE_ID in your .env or run file_data.py."
 
         formats = {
             "daily_update": (
@@ -377,11 +410,23 @@ No filler; speak decisively.""")
             f"TOPIC:\n{topic}\n"
         )
 
+        # Reuse searches already run this session; the model only needs to search for gaps.
+        gathered = self._tool_memo.context()
+        if gathered:
+            prompt += (
+                "\nALREADY GATHERED THIS SESSION (reuse where relevant; search only for what is missing):\n"
+                f"{gathered}\n"
+            )
+            logging.info("deep_research_report reusing %d chars of session context", len(gathered))
+
         try:
-            resp = self.openai_client.responses.create(
+            resp = await resilience.call(
+                "responses.research",
+                self.openai_client.responses.create,
+                timeout=resilience.timeout_for("responses.research"),
                 model="gpt-4o-mini",
                 tools=[
-                    {"type": "file_search", "vector_store_ids": [VECTOR_STORE_ID]},
+                    {"type": "file_search", "vector_store_ids": [vector_store_id]},
                     {"type": "web_search"},
                 ],
                 input=prompt,
@@ -397,6 +442,9 @@ No filler; speak decisively.""")
             first_line = report_text.splitlines()[0] if report_text else "Research ready."
             await context.session.say(first_line[:220])
             return report_text
+        except CircuitOpenError as e:
+            await context.session.say(e.fallback)
+            return e.fallback
         except Exception as e:
             logging.exception("deep_research_report failed")
             return f"Deep research error: {e}"
@@ -404,10 +452,10 @@ No filler; speak decisively.""")
 
     # ---- Save last report (no huge args; robust & fast) ----
     @function_tool(
-        description="Save the most recently generated report to disk as DOCX or PDF (default: docx).")
+        description="Save the most recently generated report to disk as DOCX, PDF, TXT or MD (default: docx).")
     async def save_last_report(self, context: RunContext, file_type: str = "docx") -> str:
-        if file_type not in ("docx", "pdf"):
-            return "Invalid file_type. Use 'docx' or 'pdf'."
+        if file_type not in EXPORT_FORMATS:
+            return "Invalid file_type. Use 'docx', 'pdf', 'txt' or 'md'."
         if not self._last_report_content or not self._last_report_topic:
             return "No report in memory. Ask me to generate a brief or report first."
 
@@ -420,7 +468,28 @@ No filler; speak decisively.""")
         except Exception as e:
             logging.exception("Save failed")
             return f"Save failed: {e}"
-    
+
+    # ---- Save every format at once ----
+    @function_tool(
+        description=("Save the most recently generated report in all formats (DOCX, PDF, TXT, MD) "
+                     "into one folder. Set zip=true to also produce a single .zip."))
+    async def save_last_report_bundle(self, context: RunContext, zip: bool = False) -> str:
+        if not self._last_report_content or not self._last_report_topic:
+            return "No report in memory. Ask me to generate a brief or report first."
+
+        try:
+            bundle = await asyncio.to_thread(
+                _save_report_bundle, self._last_report_topic, self._last_report_content, EXPORT_FORMATS, zip
+            )
+            self._last_bundle = bundle
+            self._last_saved_path = bundle["files"].get("docx") or next(iter(bundle["files"].values()))
+            await context.session.say("Saved your report in every format.")
+            logging.info("Report bundle saved at %s", bundle["folder"])
+            return bundle["zip"] or bundle["folder"]
+        except Exception as e:
+            logging.exception("Bundle save failed")
+            return f"Save failed: {e}"
+
 
 # ----------- Upload report to drive -------------
     @function_tool(
@@ -430,16 +499,40 @@ No filler; speak decisively.""")
             return "No saved report found. Ask me to save the report first."
         try:
             target_folder = folder_id or (GOOGLE_FOLDER_ID or None)
-            meta = upload_file_to_drive(self._last_saved_path, target_folder)
+            meta = await resilience.call("drive", upload_file_to_drive, self._last_saved_path, target_folder)
             link = meta.get("webViewLink") or f"https://drive.google.com/file/d/{meta.get('id')}/view"
             msg = f"Uploaded to Google Drive: {meta.get('name')} (link: {link})"
             await context.session.say("Uploaded to Google Drive.")
             logging.info(msg)
             return msg
+        except CircuitOpenError as e:
+            await context.session.say(e.fallback)
+            return e.fallback
         except Exception as e:
             logging.exception("Drive upload failed")
             return f"Drive upload failed: {e}"
 
+    @function_tool(
+        description="Upload the most recently saved report bundle (all formats) to one Google Drive folder.")
+    async def upload_last_bundle_to_drive(self, context: RunContext, folder_id: Optional[str] = None) -> str:
+        if not self._last_bundle:
+            return "No saved bundle found. Ask me to save the report in all formats first."
+        try:
+            target_folder = folder_id or (GOOGLE_FOLDER_ID or None)
+            paths = [self._last_bundle["zip"]] if self._last_bundle["zip"] else list(self._last_bundle["files"].values())
+            meta = await upload_bundle_to_drive(paths, os.path.basename(self._last_bundle["folder"]), target_folder)
+            link = meta.get("webViewLink") or f"https://drive.google.com/drive/folders/{meta.get('id')}"
+            msg = f"Uploaded {len(meta['files'])} file(s) to Google Drive folder {meta.get('name')} (link: {link})"
+            await context.session.say("Uploaded the bundle to Google Drive.")
+            logging.info(msg)
+            return msg
+        except CircuitOpenError as e:
+            await context.session.say(e.fallback)
+            return e.fallback
+        except Exception as e:
+            logging.exception("Drive bundle upload failed")
+            return f"Drive upload failed: {e}"
+
 
     # --- TOOL: compose a short email draft ---
     @function_tool(
@@ -455,7 +548,10 @@ No filler; speak decisively.""")
                     Tone: polite, clear, 80-120 words. 
                     Return plain text with a Subject line (one line) and then the email body."""
         try:
-            resp = self.openai_client.responses.create(
+            resp = await resilience.call(
+                "responses",
+                self.openai_client.responses.create,
+                timeout=resilience.timeout_for("responses"),
                 model="gpt-4o-mini",
                 input=prompt,
             )
@@ -467,6 +563,9 @@ No filler; speak decisively.""")
 
             self._pending_email = {"to": to_email, "subject": subject, "body": body}
             return f"Draft ready.\nSubject: {subject}\n\n{body}\n\nSay: 'Send the email' to send it."
+        except CircuitOpenError as e:
+            await context.session.say(e.fallback)
+            return e.fallback
         except Exception as e:
             return f"Email draft error: {e}"
         
@@ -479,7 +578,9 @@ No filler; speak decisively.""")
         if not self._pending_email:
             return "There is no composed email to send. Please ask me to compose one first."
         try:
-            meta = send_email_via_gmail(
+            meta = await resilience.call(
+                "gmail",
+                send_email_via_gmail,
                 to_email=self._pending_email["to"],
                 subject=self._pending_email["subject"],
                 body=self._pending_email["body"],
@@ -487,6 +588,9 @@ No filler; speak decisively.""")
             mid = meta.get("id", "unknown-id")
             self._pending_email = None
             return f"Email sent. Gmail message id: {mid}."
+        except CircuitOpenError as e:
+            await context.session.say(e.fallback)
+            return e.fallback
         except Exception as e:
             return f"Email send error: {e}"
 
@@ -518,7 +622,7 @@ async def entrypoint(ctx: agents.JobContext):
 
     await session.generate_reply(
         instructions=("Greet the user. You can search their files, search the web, "
-                      "produce lesson briefs or deep research, and save reports as DOCX or PDF.")
+                      "produce lesson briefs or deep research, and save reports as DOCX, PDF, TXT or Markdown.")
     )
 
 if __name__ == "__main__":
@@ -0,0 +1,42 @@
+# bench_export.py
+# Compare wall time: one bundle export vs sequential per-format saves, with and without a zip.
+# usage: python bench_export.py [paragraphs] [rounds]
+import os, sys, tempfile, time
+
+from report_export import EXPORT_FORMATS, _zip_bundle, export_report_bundle, parse_report, render_report
+
+
+def _sequential(out_dir: str, tag: str, topic: str, content: str, make_zip: bool):
+    # mirrors the old path: one save call per format, each re-parsing the text
+    paths = [render_report(os.path.join(out_dir, f"seq-{tag}.{fmt}"), parse_report(topic, content), fmt)
+             for fmt in EXPORT_FORMATS]
+    if make_zip:
+        _zip_bundle(os.path.join(out_dir, f"seq-{tag}.zip"), paths)
+
+
+if __name__ == "__main__":
+    paragraphs = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    topic = "Benchmark report"
+    content = "\n\n".join(
+        f"{i}) " + "Retrieval-augmented generation keeps answers grounded in course notes. " * 6
+        for i in range(paragraphs)
+    )
+
+    print(f"{paragraphs} paragraphs, {len(EXPORT_FORMATS)} formats, {rounds} rounds")
+    with tempfile.TemporaryDirectory() as out_dir:
+        for make_zip in (False, True):
+            seq, bundle = [], []
+            for r in range(rounds):
+                t0 = time.perf_counter()
+                _sequential(out_dir, f"{make_zip}-{r}", topic, content, make_zip)
+                seq.append(time.perf_counter() - t0)
+
+                t0 = time.perf_counter()
+                export_report_bundle(f"{topic} {make_zip} {r}", content, out_dir, make_zip=make_zip)
+                bundle.append(time.perf_counter() - t0)
+
+            label = " + zip" if make_zip else ""
+            print(f"sequential per-format{label:<6}: best {min(seq):.3f}s  mean {sum(seq) / len(seq):.3f}s")
+            print(f"bundle{label:<21}: best {min(bundle):.3f}s  mean {sum(bundle) / len(bundle):.3f}s")
@@ -0,0 +1,39 @@
+# bench_ingest.py
+# Report bytes that would be uploaded and pre-processing wall time for a corpus folder.
+# usage: python bench_ingest.py <folder-with-files>
+import os, sys, tempfile, time
+
+from doc_preprocess import preprocess_files
+from file_data import _list_files
+
+if __name__ == "__main__":
+    folder = sys.argv[1] if len(sys.argv) > 1 else None
+    if not folder or not os.path.isdir(folder):
+        print("Usage: python bench_ingest.py <folder-with-files>")
+        sys.exit(1)
+
+    paths = _list_files(folder)
+    if not paths:
+        print("No PDF/TXT/MD/DOCX files in", folder)
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as serial_cache, tempfile.TemporaryDirectory() as cache:
+        t0 = time.perf_counter()
+        preprocess_files(paths, cache_dir=serial_cache, max_workers=1)
+        serial = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        docs = preprocess_files(paths, cache_dir=cache)
+        parallel = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        preprocess_files(paths, cache_dir=cache)
+        warm = time.perf_counter() - t0
+
+    raw = sum(d["raw_bytes"] for d in docs.values())
+    sent = sum(d["text_bytes"] if d["text_path"] else d["raw_bytes"] for d in docs.values())
+    fallback = sum(1 for d in docs.values() if not d["text_path"])
+
+    print(f"{len(paths)} files, {fallback} uploaded as original (no text extracted)")
+    print(f"bytes: raw {raw:,}  ->  uploaded {sent:,}  ({sent / raw:.1%} of raw)" if raw else "bytes: 0")
+    print(f"extract serial {serial:.2f}s | parallel ({os.cpu_count()} cores) {parallel:.2f}s | cached {warm:.2f}s")
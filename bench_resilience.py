@@ -0,0 +1,78 @@
+# bench_resilience.py
+# Fault-injecting local stub server; reports tail latency and error rate
+# for plain calls vs calls through resilience.call.
+# usage: python bench_resilience.py [requests] [slow_rate] [error_rate]
+import asyncio, http.server, logging, random, sys, threading, time, urllib.request
+
+import resilience
+
+FAST_S, SLOW_S = 0.02, 1.5
+
+
+class _FaultyHandler(http.server.BaseHTTPRequestHandler):
+    slow_rate = 0.05
+    error_rate = 0.05
+
+    def do_GET(self):
+        roll = random.random()
+        if roll < self.error_rate:
+            self.send_response(503)
+            self.end_headers()
+            return
+        time.sleep(SLOW_S if roll < self.error_rate + self.slow_rate else FAST_S)
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+def _fetch(url: str) -> bytes:
+    with urllib.request.urlopen(url, timeout=10) as r:
+        return r.read()
+
+def _pct(samples: list, p: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+async def _run(label: str, url: str, n: int, through_layer: bool):
+    latencies, errors = [], 0
+    sem = asyncio.Semaphore(8)
+
+    async def one():
+        nonlocal errors
+        async with sem:
+            start = time.monotonic()
+            try:
+                if through_layer:
+                    await resilience.call("stub", _fetch, url)
+                else:
+                    await asyncio.to_thread(_fetch, url)
+            except Exception:
+                errors += 1
+            latencies.append(time.monotonic() - start)
+
+    await asyncio.gather(*(one() for _ in range(n)))
+    print(f"{label:<16} p50 {_pct(latencies, 0.5) * 1000:7.1f}ms  "
+          f"p95 {_pct(latencies, 0.95) * 1000:7.1f}ms  p99 {_pct(latencies, 0.99) * 1000:7.1f}ms  "
+          f"errors {errors}/{n}")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    _FaultyHandler.slow_rate = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    _FaultyHandler.error_rate = float(sys.argv[3]) if len(sys.argv) > 3 else 0.05
+
+    logging.basicConfig(level=logging.ERROR)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _FaultyHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    resilience.configure("stub", timeout=2.0, retries=2, backoff=0.02, hedge_percentile=0.9,
+                         hedge_min_samples=20, failure_threshold=50)
+    print(f"{n} requests, slow {_FaultyHandler.slow_rate:.0%} ({SLOW_S}s), errors {_FaultyHandler.error_rate:.0%}")
+    asyncio.run(_run("without layer", url, n, through_layer=False))
+    asyncio.run(_run("with layer", url, n, through_layer=True))
+    print("layer stats:", resilience.endpoint_stats("stub"))
+    server.shutdown()
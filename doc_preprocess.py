@@ -0,0 +1,198 @@
+# doc_preprocess.py
+# Local text extraction + cleanup for the knowledge folder, cached by content hash.
+# file_data.py uploads the compact text this produces instead of the original binaries.
+import hashlib
+import json
+import logging
+import os
+import re
+import unicodedata
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+# default sits next to this module (like file_data.STATE_PATH) so every run shares one cache
+CACHE_DIR = os.getenv("INGEST_CACHE") or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".ingest_cache")
+PIPELINE_VERSION = "3"  # bump when extraction/normalization changes to invalidate the cache
+DEDUPE_MIN_CHARS = 200  # only paragraphs this long are deduped; short ones are headings/labels
+
+_PAGE_NUMBER = re.compile(r"^\s*(page\s*)?\d+(\s*(/|of)\s*\d+)?\s*$", re.IGNORECASE)
+_CONTROL = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]")
+_PAGE_REF = re.compile(r"\bpage\s*\d+(\s*(/|of)\s*\d+)?", re.IGNORECASE)
+EDGE_LINES = 3  # running headers/footers are looked for only this close to a page edge
+
+
+# ---------- Extraction ----------
+def _extract_pdf(path: str) -> Optional[list]:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        return None
+    return [page.extract_text() or "" for page in PdfReader(path).pages]
+
+def _extract_docx(path: str) -> list:
+    from docx import Document
+    doc = Document(path)
+    parts = [p.text for p in doc.paragraphs]
+    for table in doc.tables:
+        parts.append("\n".join(" | ".join(cell.text.strip() for cell in row.cells) for row in table.rows))
+    # blank line between Word paragraphs so they stay separate paragraphs downstream
+    return ["\n\n".join(parts)]
+
+def _extract_text(path: str) -> list:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return [f.read()]
+
+def _extract_pages(path: str) -> Optional[list]:
+    """Page texts, or None when this format can't be read locally (upload the original)."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".pdf":
+        return _extract_pdf(path)
+    if ext == ".docx":
+        return _extract_docx(path)
+    if ext in (".md", ".txt"):
+        return _extract_text(path)
+    return None
+
+
+# ---------- Normalization ----------
+def _boilerplate_key(line: str) -> str:
+    # "Module 3 — Page 12" and "Module 3 — Page 13" count as the same footer
+    return _PAGE_REF.sub("page #", line.lower())
+
+def _edge_lines(lines: list) -> list:
+    content = [i for i, ln in enumerate(lines) if ln]
+    return content[:EDGE_LINES] + content[-EDGE_LINES:]
+
+def _normalize(pages: list) -> str:
+    """Clean unicode, drop page numbers and repeated headers/footers, dedupe long paragraphs."""
+    paginated = len(pages) > 1
+    cleaned = []
+    for page in pages:
+        page = unicodedata.normalize("NFKC", page).replace("\u00ad", "")
+        page = _CONTROL.sub("", page)
+        # join lines broken at a hyphen but keep the hyphen: "state-of-the-\nart" stays a compound
+        page = re.sub(r"(\w)-\n(\w)", r"\1-\2", page)
+        lines = [re.sub(r"[ \t]+", " ", ln).strip() for ln in page.splitlines()]
+        if paginated:
+            # page numbers sit at a page edge; a bare "2024" mid-page is content
+            numbers = {i for i in _edge_lines(lines) if _PAGE_NUMBER.match(lines[i])}
+            lines = [ln for i, ln in enumerate(lines) if i not in numbers]
+        cleaned.append(lines)
+
+    # A line near the top/bottom of at least half the pages (and 3+) is a running
+    # header/footer: keep its first occurrence, drop the repeats.
+    if len(cleaned) >= 3:
+        seen = Counter(k for lines in cleaned for k in {_boilerplate_key(lines[i]) for i in _edge_lines(lines)})
+        limit = max(3, len(cleaned) // 2)
+        boiler = {k for k, n in seen.items() if n >= limit}
+        kept = set()
+        for n, lines in enumerate(cleaned):
+            drop = set()
+            for i in sorted(set(_edge_lines(lines))):
+                key = _boilerplate_key(lines[i])
+                if key in boiler:
+                    if key in kept:
+                        drop.add(i)
+                    kept.add(key)
+            cleaned[n] = [ln for i, ln in enumerate(lines) if i not in drop]
+
+    text = "\n".join("\n".join(lines) for lines in cleaned)
+    paragraphs, seen_paras = [], set()
+    for para in re.split(r"\n\s*\n", text):
+        para = para.strip()
+        if not para:
+            continue
+        # repeated disclaimers/boilerplate blocks go; repeated headings ("## Exercises") stay
+        if len(para) >= DEDUPE_MIN_CHARS:
+            key = para.lower()
+            if key in seen_paras:
+                continue
+            seen_paras.add(key)
+        paragraphs.append(para)
+    return "\n\n".join(paragraphs)
+
+
+# ---------- Cache ----------
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _write_atomic(path: str, data: bytes):
+    # pid in the temp name: two workers may process identical files at once
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def _load_cached(meta_path: str, text_path: str) -> Optional[dict]:
+    """Cached meta, or None on a miss, a corrupt entry, or a missing text file."""
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            doc = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if doc.get("text_path") and not os.path.exists(text_path):
+        return None
+    return doc
+
+def _cache_paths(digest: str, cache_dir: str) -> tuple:
+    key = f"{digest}-v{PIPELINE_VERSION}"
+    return os.path.join(cache_dir, key + ".json"), os.path.join(cache_dir, key + ".txt")
+
+def preprocess_file(path: str, digest: Optional[str] = None, cache_dir: str = CACHE_DIR) -> dict:
+    """
+    Returns {"source", "digest", "raw_bytes", "text_path", "text_bytes", "cached"}.
+    text_path is None when nothing usable was extracted (e.g. a scanned PDF).
+    """
+    digest = digest or file_digest(path)
+    meta_path, text_path = _cache_paths(digest, cache_dir)
+    doc = _load_cached(meta_path, text_path)
+    if doc is not None:
+        doc.update(source=path, cached=True)
+        return doc
+
+    try:
+        pages = _extract_pages(path)
+    except Exception as e:
+        logging.warning("Text extraction failed for %s: %s", path, e)
+        pages = None
+    text = _normalize(pages) if pages else ""
+    doc = {
+        "source": path,
+        "digest": digest,
+        "raw_bytes": os.path.getsize(path),
+        "text_path": None,
+        "text_bytes": 0,
+        "cached": False,
+    }
+    os.makedirs(cache_dir, exist_ok=True)
+    if text:
+        body = text.encode("utf-8")
+        _write_atomic(text_path, body)
+        doc.update(text_path=text_path, text_bytes=len(body))
+    if pages is not None:
+        # don't cache "unreadable" so installing pypdf or fixing the file takes effect
+        _write_atomic(meta_path, json.dumps(doc).encode("utf-8"))
+    return doc
+
+def _preprocess_job(job: tuple) -> dict:
+    # Top-level so ProcessPoolExecutor can pickle it.
+    path, digest, cache_dir = job
+    return preprocess_file(path, digest, cache_dir)
+
+def preprocess_files(paths: list, digests: Optional[dict] = None, cache_dir: str = CACHE_DIR,
+                     max_workers: Optional[int] = None) -> dict:
+    """Preprocess many files across cores. Returns {path: doc}."""
+    digests = digests or {}
+    jobs = [(p, digests.get(p), cache_dir) for p in paths]
+    if len(jobs) > 1 and max_workers != 1:
+        workers = max_workers or min(len(jobs), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            docs = list(pool.map(_preprocess_job, jobs))
+    else:
+        docs = [_preprocess_job(j) for j in jobs]
+    return dict(zip(paths, docs))
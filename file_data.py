@@ -2,36 +2,256 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-import os, sys, glob
-from openai import OpenAI
+import os, sys, glob, sqlite3, threading, time
+from typing import Optional
 
-# usage: python setup_vector_store.py "C:/Users/visha/Downloads/knowledge"
-folder = sys.argv[1] if len(sys.argv) > 1 else None
-if not folder or not os.path.isdir(folder):
-    print("Usage: python setup_vector_store.py <folder-with-files>")
-    sys.exit(1)
+from doc_preprocess import file_digest, preprocess_files
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# usage:
+#   python setup_vector_store.py "C:/Users/visha/Downloads/knowledge"          (sync once)
+#   python setup_vector_store.py "C:/Users/visha/Downloads/knowledge" --watch  (keep syncing)
+#   add --raw to upload the original PDF/DOCX files instead of locally extracted text
+# The store id is kept in VECTOR_STORE_STATE, so re-runs update the same store.
+EXTENSIONS = ("*.pdf", "*.txt", "*.md", "*.docx")
+# default sits next to this script so VA.py finds it whatever directory either was started from
+STATE_PATH = os.getenv("VECTOR_STORE_STATE") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "vector_store_state.db")
+DEBOUNCE_S = float(os.getenv("VECTOR_STORE_DEBOUNCE", "2.0"))
+POLL_S = float(os.getenv("VECTOR_STORE_POLL", "5.0"))
 
-# 1) create vector store
-vs = client.vector_stores.create(name="voice-agent-knowledge")
-print("Vector store created:", vs.id)
 
-# 2) upload files in the folder
-paths = []
-for ext in ("*.pdf", "*.txt", "*.md", "*.docx"):
-    paths.extend(glob.glob(os.path.join(folder, ext)))
+# ---------- State DB ----------
+def _open_state(state_path: str = STATE_PATH) -> sqlite3.Connection:
+    db = sqlite3.connect(state_path)
+    db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    db.execute("""CREATE TABLE IF NOT EXISTS files (
+        path TEXT PRIMARY KEY, sha256 TEXT, size INTEGER, mtime REAL, file_id TEXT)""")
+    # file ids we failed to remove from the store; retried at the start of every sync
+    db.execute("CREATE TABLE IF NOT EXISTS pending_delete (file_id TEXT PRIMARY KEY)")
+    db.commit()
+    return db
 
-if not paths:
-    print("No files found to upload. Add PDFs/TXT/MD/DOCX to the folder and re-run.")
-    sys.exit(0)
+def stored_vector_store_id(state_path: str = STATE_PATH) -> Optional[str]:
+    """Store id recorded by the last sync, or None if no sync has run."""
+    if not os.path.exists(state_path):
+        return None
+    db = sqlite3.connect(state_path)
+    try:
+        row = db.execute("SELECT value FROM meta WHERE key = 'vector_store_id'").fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    finally:
+        db.close()
+    return row[0] if row else None
+
+
+# ---------- Sync ----------
+def _ensure_store(client, db: sqlite3.Connection) -> str:
+    """Reuse VECTOR_STORE_ID / the recorded store; create one only on the very first run."""
+    row = db.execute("SELECT value FROM meta WHERE key = 'vector_store_id'").fetchone()
+    vs_id = os.getenv("VECTOR_STORE_ID") or (row[0] if row else None)
+    if not vs_id:
+        vs_id = client.vector_stores.create(name="voice-agent-knowledge").id
+        print("Vector store created:", vs_id)
+        print("Put this in your .env (or leave it unset to use the state DB):\nVECTOR_STORE_ID=" + vs_id)
+    if not row or row[0] != vs_id:
+        if row:
+            # Store changed under us: recorded file ids belong to the old store.
+            db.execute("DELETE FROM files")
+            db.execute("DELETE FROM pending_delete")
+        db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('vector_store_id', ?)", (vs_id,))
+        db.commit()
+    return vs_id
+
+def _list_files(folder: str) -> list:
+    paths = []
+    for ext in EXTENSIONS:
+        paths.extend(glob.glob(os.path.join(folder, ext)))
+    return sorted(os.path.abspath(p) for p in paths)
 
-for p in paths:
+def _detach(client, vs_id: str, file_id: str) -> bool:
+    """Remove a file from the store and delete it. True when it is gone (404 counts as gone)."""
+    ok = True
     try:
-        f = client.files.create(file=open(p, "rb"), purpose="assistants")
-        client.vector_stores.files.create(vector_store_id=vs.id, file_id=f.id)
-        print("Uploaded:", os.path.basename(p))
+        client.vector_stores.files.delete(vector_store_id=vs_id, file_id=file_id)
     except Exception as e:
-        print("Failed:", p, "-", e)
+        if getattr(e, "status_code", None) != 404:
+            print("Detach failed:", file_id, "-", e)
+            ok = False
+    try:
+        client.files.delete(file_id)
+    except Exception as e:
+        if getattr(e, "status_code", None) != 404:
+            print("Delete failed:", file_id, "-", e)
+            ok = False
+    return ok
+
+def _detach_or_queue(client, vs_id: str, file_id: str, db: sqlite3.Connection):
+    if not _detach(client, vs_id, file_id):
+        db.execute("INSERT OR IGNORE INTO pending_delete (file_id) VALUES (?)", (file_id,))
+
+def _retry_pending_deletes(client, vs_id: str, db: sqlite3.Connection) -> int:
+    """Retry earlier failed deletes; returns how many are still pending."""
+    pending = [row[0] for row in db.execute("SELECT file_id FROM pending_delete")]
+    for file_id in pending:
+        if _detach(client, vs_id, file_id):
+            db.execute("DELETE FROM pending_delete WHERE file_id = ?", (file_id,))
+    db.commit()
+    return db.execute("SELECT COUNT(*) FROM pending_delete").fetchone()[0]
+
+def _upload(client, path: str, doc: Optional[dict]):
+    """Upload the extracted text when we have it, otherwise the original file."""
+    if doc and doc["text_path"]:
+        with open(doc["text_path"], "rb") as fh:
+            return client.files.create(file=(os.path.basename(path) + ".txt", fh), purpose="assistants"), doc["text_bytes"]
+    with open(path, "rb") as fh:
+        return client.files.create(file=fh, purpose="assistants"), os.path.getsize(path)
+
+def sync_folder(client, folder: str, db: sqlite3.Connection, preprocess: bool = True) -> dict:
+    """Upload new/changed files, remove deleted ones. Returns counts (incl. raw vs uploaded bytes)."""
+    vs_id = _ensure_store(client, db)
+    known = {row[0]: row[1:] for row in db.execute("SELECT path, sha256, size, mtime, file_id FROM files")}
+    counts = {"uploaded": 0, "updated": 0, "removed": 0, "unchanged": 0, "failed": 0,
+              "raw_bytes": 0, "uploaded_bytes": 0, "pending_delete": 0}
+    _retry_pending_deletes(client, vs_id, db)
+
+    current = _list_files(folder)
+    changed = {}
+    for p in current:
+        prev = known.get(p)
+        try:
+            st = os.stat(p)
+            # cheap check first; only hash when size/mtime moved
+            if prev and prev[1] == st.st_size and prev[2] == st.st_mtime:
+                counts["unchanged"] += 1
+                continue
+            digest = file_digest(p)
+        except OSError as e:
+            # deleted since the glob, or locked by an editor; next cycle picks it up
+            print("Skipped:", p, "-", e)
+            counts["failed"] += 1
+            continue
+        if prev and prev[0] == digest:
+            db.execute("UPDATE files SET size = ?, mtime = ? WHERE path = ?", (st.st_size, st.st_mtime, p))
+            db.commit()
+            counts["unchanged"] += 1
+            continue
+        changed[p] = (digest, st)
+
+    # extract text for every changed file in parallel, then upload one by one
+    docs = {}
+    if preprocess and changed:
+        try:
+            docs = preprocess_files(list(changed), {p: d for p, (d, _) in changed.items()})
+        except Exception as e:
+            print("Pre-processing failed, uploading originals:", e)
+
+    for p, (digest, st) in changed.items():
+        prev = known.get(p)
+        try:
+            f, sent = _upload(client, p, docs.get(p))
+            client.vector_stores.files.create(vector_store_id=vs_id, file_id=f.id)
+        except Exception as e:
+            print("Failed:", p, "-", e)
+            counts["failed"] += 1
+            continue
+        counts["raw_bytes"] += st.st_size
+        counts["uploaded_bytes"] += sent
+        if prev:
+            _detach_or_queue(client, vs_id, prev[3], db)
+            counts["updated"] += 1
+        else:
+            counts["uploaded"] += 1
+        db.execute("INSERT OR REPLACE INTO files (path, sha256, size, mtime, file_id) VALUES (?, ?, ?, ?, ?)",
+                   (p, digest, st.st_size, st.st_mtime, f.id))
+        db.commit()
+        print("Uploaded:" if not prev else "Updated:", os.path.basename(p))
+
+    gone = set(known) - set(current)
+    for p in sorted(gone):
+        _detach_or_queue(client, vs_id, known[p][3], db)
+        db.execute("DELETE FROM files WHERE path = ?", (p,))
+        db.commit()
+        counts["removed"] += 1
+        print("Removed:", os.path.basename(p))
+
+    counts["pending_delete"] = db.execute("SELECT COUNT(*) FROM pending_delete").fetchone()[0]
+    return counts
+
+
+# ---------- Watch ----------
+def _start_watcher(folder: str, changed: threading.Event):
+    """Native file events via watchdog (inotify on Linux) if installed; None means poll."""
+    try:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+    except ImportError:
+        return None
+
+    class _Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            if not event.is_directory:
+                changed.set()
+
+    observer = Observer()
+    observer.schedule(_Handler(), folder, recursive=False)
+    observer.start()
+    return observer
+
+def watch_folder(client, folder: str, db: sqlite3.Connection, preprocess: bool = True):
+    changed = threading.Event()
+    observer = _start_watcher(folder, changed)
+    print("Watching", folder, "with file events" if observer else f"by polling every {POLL_S:g}s", "(Ctrl+C to stop)")
+    try:
+        while True:
+            if observer:
+                changed.wait()
+                # debounce: wait until the folder has been quiet for DEBOUNCE_S
+                while True:
+                    changed.clear()
+                    if not changed.wait(DEBOUNCE_S):
+                        break
+            else:
+                time.sleep(POLL_S)
+            try:
+                counts = sync_folder(client, folder, db, preprocess)
+            except Exception as e:
+                # keep the daemon alive; the next change or poll retries
+                print("Sync failed:", e)
+                continue
+            if counts["uploaded"] or counts["updated"] or counts["removed"] or counts["failed"] or counts["pending_delete"]:
+                print("Synced:", counts)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if observer:
+            observer.stop()
+            observer.join()
+
+
+if __name__ == "__main__":
+    from openai import OpenAI
+
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    folder = args[0] if args else None
+    if not folder or not os.path.isdir(folder):
+        print("Usage: python setup_vector_store.py <folder-with-files> [--watch] [--raw]")
+        sys.exit(1)
+
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    db = _open_state()
+
+    preprocess = "--raw" not in sys.argv
+    started = time.perf_counter()
+    counts = sync_folder(client, folder, db, preprocess)
+    elapsed = time.perf_counter() - started
+    if not _list_files(folder) and "--watch" not in sys.argv:
+        print("No files found to upload. Add PDFs/TXT/MD/DOCX to the folder and re-run.")
+        sys.exit(0)
+    print(f"\nDONE in {elapsed:.1f}s.", counts)
+    if counts["raw_bytes"]:
+        print(f"Uploaded {counts['uploaded_bytes']:,} bytes for {counts['raw_bytes']:,} bytes of source files.")
+    print("VECTOR_STORE_ID=" + _ensure_store(client, db))
 
-print("\nDONE. Put this in your .env:\nVECTOR_STORE_ID=" + vs.id)
+    if "--watch" in sys.argv:
+        watch_folder(client, folder, db, preprocess)
@@ -0,0 +1,167 @@
+# report_export.py
+# Renders one research report into DOCX / PDF / TXT / Markdown.
+# Kept free of livekit/openai imports so it can be used and benchmarked on its own.
+import logging
+import os
+import re
+import shutil
+import zipfile
+from datetime import datetime
+
+from docx import Document
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+EXPORT_FORMATS = ("docx", "pdf", "txt", "md")
+
+
+# ---------- Helpers ----------
+def slugify(s: str) -> str:
+    s = (s or "report").lower()
+    s = re.sub(r"[^a-z0-9]+", "-", s).strip("-")
+    return s[:60] or "report"
+
+def ensure_dir(path: str):
+    os.makedirs(path, exist_ok=True)
+
+def parse_report(topic: str, content: str) -> dict:
+    """Split the report text once; every renderer reads from this dict."""
+    content = content or ""
+    return {
+        "topic": topic,
+        "title": f"Research Report: {topic}",
+        "paragraphs": content.split("\n\n"),
+        "lines": content.splitlines(),
+        "content": content,
+    }
+
+
+# ---------- Renderers (all take the parsed report) ----------
+def _render_docx(path: str, report: dict):
+    doc = Document()
+    doc.add_heading(report["title"], 0)
+    for para in report["paragraphs"]:
+        doc.add_paragraph(para)
+    doc.save(path)
+
+def _render_pdf(path: str, report: dict):
+    c = canvas.Canvas(path, pagesize=letter)
+    width, height = letter
+    margin_x, margin_y = 72, 72  # 1 inch margins
+
+    # Title
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(margin_x, height - margin_y, report["title"])
+
+    # Body
+    c.setFont("Helvetica", 11)
+    y = height - margin_y - 24
+    max_chars = 95
+
+    def draw_line(line: str, y_pos: float):
+        c.drawString(margin_x, y_pos, line)
+
+    for raw_line in report["lines"]:
+        line = raw_line
+        if not line:
+            y -= 14
+            if y < margin_y:
+                c.showPage()
+                c.setFont("Helvetica", 11)
+                y = height - margin_y
+            continue
+
+        # naive wrapping
+        while len(line) > max_chars:
+            draw_line(line[:max_chars], y)
+            line = line[max_chars:]
+            y -= 14
+            if y < margin_y:
+                c.showPage()
+                c.setFont("Helvetica", 11)
+                y = height - margin_y
+        draw_line(line, y)
+        y -= 14
+        if y < margin_y:
+            c.showPage()
+            c.setFont("Helvetica", 11)
+            y = height - margin_y
+
+    c.save()
+
+def _render_txt(path: str, report: dict):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(report["title"] + "\n\n" + report["content"] + "\n")
+
+def _render_md(path: str, report: dict):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"# {report['title']}\n\n" + report["content"] + "\n")
+
+_RENDERERS = {
+    "docx": _render_docx,
+    "pdf": _render_pdf,
+    "txt": _render_txt,
+    "md": _render_md,
+}
+
+def render_report(path: str, report: dict, file_type: str) -> str:
+    """Render to a temp name next to `path`, then atomically rename into place."""
+    if file_type not in _RENDERERS:
+        raise ValueError(f"file_type must be one of {', '.join(EXPORT_FORMATS)}")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        _RENDERERS[file_type](tmp_path, report)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+
+# ---------- Bundle ----------
+def _zip_bundle(zip_path: str, paths: list) -> str:
+    """Stream each file into the archive in chunks; the zip itself is renamed into place."""
+    tmp_path = zip_path + ".tmp"
+    try:
+        with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for p in paths:
+                with open(p, "rb") as src, zf.open(os.path.basename(p), "w") as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.replace(tmp_path, zip_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return zip_path
+
+def export_report_bundle(
+    topic: str,
+    content: str,
+    out_dir: str,
+    formats=EXPORT_FORMATS,
+    make_zip: bool = False,
+) -> dict:
+    """
+    Render every requested format into <out_dir>/<report-base>/ from one parsed report.
+    Formats render one after another: a report takes tens of milliseconds, and
+    bench_export.py showed process/thread pools only adding start-up and pickling cost.
+    Returns {"folder", "files": {fmt: path}, "zip": path-or-None}.
+    """
+    formats = tuple(dict.fromkeys(formats))
+    bad = [f for f in formats if f not in _RENDERERS]
+    if bad:
+        raise ValueError(f"Unsupported format(s): {', '.join(bad)}")
+
+    timestamp = datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
+    base = f"research_report-{slugify(topic)}-{timestamp}"
+    folder = os.path.join(out_dir, base)
+    ensure_dir(folder)
+
+    report = parse_report(topic, content)
+    paths = [render_report(os.path.join(folder, f"{base}.{fmt}"), report, fmt) for fmt in formats]
+
+    zip_path = None
+    if make_zip:
+        zip_path = _zip_bundle(os.path.join(out_dir, base + ".zip"), paths)
+
+    logging.info("Exported %d format(s) to %s", len(paths), folder)
+    return {"folder": folder, "files": dict(zip(formats, paths)), "zip": zip_path}
@@ -0,0 +1,231 @@
+# resilience.py
+# Shared timeout / retry / hedging / circuit-breaker layer for blocking external calls
+# (OpenAI Responses API, Drive, Gmail). Standard library only.
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Optional
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling upstream while an endpoint's breaker is open."""
+
+    def __init__(self, endpoint: str, fallback: str):
+        super().__init__(f"{endpoint} circuit open")
+        self.endpoint = endpoint
+        self.fallback = fallback
+
+
+class EndpointPolicy:
+    """
+    Per-endpoint knobs.
+    - timeout: seconds for one attempt (hedged duplicates share it).
+    - retries / backoff / max_backoff: extra attempts with full-jitter exponential sleep.
+    - retry_on: exception types worth retrying; anything else fails immediately.
+      HTTP 4xx errors (other than 408/429) are never retried and never count
+      toward the breaker: the service answered, the request was wrong.
+    - hedge_percentile: after this latency percentile, fire one duplicate request.
+      Leave None for non-idempotent calls (sending mail, creating files).
+    - failure_threshold / reset_after: consecutive failures that open the breaker,
+      and seconds before a single half-open probe is let through.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 30.0,
+        retries: int = 2,
+        backoff: float = 0.5,
+        max_backoff: float = 4.0,
+        retry_on: tuple = (Exception,),
+        hedge_percentile: Optional[float] = None,
+        hedge_min_samples: int = 20,
+        failure_threshold: int = 5,
+        reset_after: float = 30.0,
+        fallback: str = "That service is not responding right now. Please try again in a minute.",
+    ):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retry_on = retry_on
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.fallback = fallback
+
+
+def _is_client_error(e: BaseException) -> bool:
+    """4xx from openai (status_code) or googleapiclient (resp.status), except timeout/rate limit."""
+    status = getattr(e, "status_code", None)
+    if status is None:
+        status = getattr(getattr(e, "resp", None), "status", None)
+    try:
+        status = int(status)
+    except (TypeError, ValueError):
+        return False
+    return 400 <= status < 500 and status not in (408, 429)
+
+
+class CircuitBreaker:
+    """Closed -> open after N consecutive failures -> half-open probe after a cooldown."""
+
+    def __init__(self, failure_threshold: int, reset_after: float):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_after:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def release_probe(self):
+        """The probe ended without a verdict (cancelled); let the next call probe instead."""
+        self._probing = False
+
+
+class _Endpoint:
+    def __init__(self, name: str, policy: EndpointPolicy):
+        self.name = name
+        self.policy = policy
+        self.breaker = CircuitBreaker(policy.failure_threshold, policy.reset_after)
+        self.latencies = deque(maxlen=200)
+        self.stats = {"calls": 0, "retries": 0, "hedges": 0, "timeouts": 0, "short_circuits": 0, "failures": 0}
+
+    def hedge_delay(self) -> Optional[float]:
+        p = self.policy.hedge_percentile
+        if p is None or len(self.latencies) < self.policy.hedge_min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+_ENDPOINTS: dict = {}
+
+def configure(name: str, **policy_kwargs) -> EndpointPolicy:
+    """Register (or replace) the policy for an endpoint name."""
+    policy = EndpointPolicy(**policy_kwargs)
+    _ENDPOINTS[name] = _Endpoint(name, policy)
+    return policy
+
+def _endpoint(name: str) -> _Endpoint:
+    if name not in _ENDPOINTS:
+        _ENDPOINTS[name] = _Endpoint(name, EndpointPolicy())
+    return _ENDPOINTS[name]
+
+def timeout_for(name: str) -> float:
+    """Per-attempt timeout of an endpoint; pass it to the SDK so abandoned attempts actually end."""
+    return _endpoint(name).policy.timeout
+
+def endpoint_stats(name: str) -> dict:
+    ep = _endpoint(name)
+    return dict(ep.stats, state=ep.breaker.state)
+
+
+async def _timed(ep: _Endpoint, fn, args, kwargs):
+    start = time.monotonic()
+    result = await asyncio.to_thread(fn, *args, **kwargs)
+    ep.latencies.append(time.monotonic() - start)
+    return result
+
+def _spawn(ep: _Endpoint, fn, args, kwargs) -> asyncio.Task:
+    task = asyncio.ensure_future(_timed(ep, fn, args, kwargs))
+    # Losing hedges may fail after we stop listening; don't warn about that.
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    return task
+
+async def _attempt(ep: _Endpoint, fn, args, kwargs):
+    """One logical attempt: primary request, plus a hedged duplicate if it runs past the percentile."""
+    deadline = time.monotonic() + ep.policy.timeout
+    pending = {_spawn(ep, fn, args, kwargs)}
+    error: Optional[BaseException] = None
+    try:
+        delay = ep.hedge_delay()
+        if delay is not None and delay < ep.policy.timeout:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                ep.stats["hedges"] += 1
+                pending.add(_spawn(ep, fn, args, kwargs))
+
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        if error is not None and not pending:
+            raise error
+        ep.stats["timeouts"] += 1
+        raise asyncio.TimeoutError(f"{ep.name} timed out after {ep.policy.timeout:.1f}s")
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def call(name: str, fn, *args, **kwargs):
+    """
+    Run blocking `fn(*args, **kwargs)` in a worker thread under the endpoint's policy.
+    Raises CircuitOpenError (carrying a spoken fallback) when the breaker is open,
+    otherwise the last upstream error once retries are spent.
+    """
+    ep = _endpoint(name)
+    policy = ep.policy
+    ep.stats["calls"] += 1
+
+    for attempt in range(policy.retries + 1):
+        if not ep.breaker.allow():
+            ep.stats["short_circuits"] += 1
+            raise CircuitOpenError(name, policy.fallback)
+        try:
+            result = await _attempt(ep, fn, args, kwargs)
+        except asyncio.CancelledError:
+            # LiveKit cancels tool calls on barge-in; a cancelled probe must not wedge half-open
+            ep.breaker.release_probe()
+            raise
+        except Exception as e:
+            if _is_client_error(e):
+                # upstream is healthy; surface the real error (e.g. 404 for a stale store id)
+                ep.breaker.record_success()
+                ep.stats["failures"] += 1
+                raise
+            ep.breaker.record_failure()
+            if attempt >= policy.retries or not isinstance(e, policy.retry_on):
+                ep.stats["failures"] += 1
+                raise
+            ep.stats["retries"] += 1
+            sleep_for = random.uniform(0, min(policy.max_backoff, policy.backoff * (2 ** attempt)))
+            logging.warning("%s attempt %d failed (%s); retrying in %.2fs", name, attempt + 1, e, sleep_for)
+            await asyncio.sleep(sleep_for)
+        else:
+            ep.breaker.record_success()
+            return result
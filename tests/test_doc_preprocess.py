@@ -0,0 +1,55 @@
+import doc_preprocess
+
+
+def test_hyphen_line_break_keeps_compounds():
+    assert doc_preprocess._normalize(["state-of-the-\nart well-\nknown"]) == "state-of-the-art well-known"
+
+
+def test_running_footer_dropped_but_content_kept():
+    slides = [
+        f"Step {i}\nKey takeaways\nEmbeddings map text.\nBody {i}.\nModule 3 — Page {i}"
+        for i in range(1, 7)
+    ]
+    text = doc_preprocess._normalize(slides)
+    for i in range(1, 7):
+        assert f"Step {i}" in text
+        assert f"Body {i}." in text
+    assert text.count("Module 3 — Page") == 1
+    assert "Key takeaways" in text
+
+
+def test_corrupt_cache_entry_is_a_miss(tmp_path):
+    src = tmp_path / "notes.md"
+    src.write_text("Embeddings map text to vectors.", encoding="utf-8")
+    cache = tmp_path / "cache"
+    first = doc_preprocess.preprocess_file(str(src), cache_dir=str(cache))
+    meta_path, _ = doc_preprocess._cache_paths(first["digest"], str(cache))
+    with open(meta_path, "w", encoding="utf-8") as f:
+        f.write('{"digest": "trunc')
+
+    again = doc_preprocess.preprocess_file(str(src), cache_dir=str(cache))
+    assert again["cached"] is False
+    assert again["text_bytes"] == first["text_bytes"]
+    assert doc_preprocess.preprocess_file(str(src), cache_dir=str(cache))["cached"] is True
+
+
+def test_repeated_headings_survive_paragraph_dedupe():
+    disclaimer = "These notes are for cohort participants only. " * 6
+    notes = (
+        f"# Module 1\n\n## Exercises\n\nBuild a RAG demo.\n\n{disclaimer}\n\n"
+        f"# Module 2\n\n## Exercises\n\nFine-tune a small model.\n\n{disclaimer}"
+    )
+    text = doc_preprocess._normalize([notes])
+    assert text.count("## Exercises") == 2
+    assert text.index("# Module 2") < text.rindex("## Exercises") < text.index("Fine-tune")
+    assert text.count(disclaimer.strip()) == 1
+
+
+def test_only_edge_page_numbers_are_dropped():
+    pages = [
+        f"Results\nSummary {i}.\nAdoption grew in\nthe year\n2024\nacross teams.\nMore detail {i}.\nEnd {i}.\n{i}"
+        for i in range(1, 4)
+    ]
+    lines = doc_preprocess._normalize(pages).splitlines()
+    assert lines.count("2024") == 3
+    assert not any(ln in ("1", "2", "3") for ln in lines)
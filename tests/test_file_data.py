@@ -0,0 +1,82 @@
+import itertools
+
+import file_data
+
+
+class _NotFound(Exception):
+    status_code = 404
+
+
+class _FakeClient:
+    """Minimal OpenAI stand-in: records store contents; deletes can be made to fail."""
+
+    def __init__(self):
+        self.ids = itertools.count()
+        self.store = set()
+        self.uploaded = set()
+        self.fail_deletes = False
+        client = self
+
+        class _Files:
+            def create(self, file, purpose):
+                fid = f"file-{next(client.ids)}"
+                client.uploaded.add(fid)
+                return type("F", (), {"id": fid})()
+
+            def delete(self, file_id):
+                if client.fail_deletes:
+                    raise ConnectionError("network blip")
+                if file_id not in client.uploaded:
+                    raise _NotFound(file_id)
+                client.uploaded.discard(file_id)
+
+        class _StoreFiles:
+            def create(self, vector_store_id, file_id):
+                client.store.add(file_id)
+
+            def delete(self, vector_store_id, file_id):
+                if client.fail_deletes:
+                    raise ConnectionError("network blip")
+                if file_id not in client.store:
+                    raise _NotFound(file_id)
+                client.store.discard(file_id)
+
+        class _Stores:
+            files = _StoreFiles()
+
+            def create(self, name):
+                return type("VS", (), {"id": "vs_test"})()
+
+        self.files = _Files()
+        self.vector_stores = _Stores()
+
+
+def _sync(client, folder, db):
+    return file_data.sync_folder(client, str(folder), db, preprocess=False)
+
+
+def test_failed_delete_is_retried_next_cycle(tmp_path, monkeypatch):
+    monkeypatch.delenv("VECTOR_STORE_ID", raising=False)
+    folder = tmp_path / "notes"
+    folder.mkdir()
+    (folder / "a.md").write_text("alpha", encoding="utf-8")
+    (folder / "b.md").write_text("beta", encoding="utf-8")
+    db = file_data._open_state(str(tmp_path / "state.db"))
+    client = _FakeClient()
+
+    _sync(client, folder, db)
+    assert len(client.store) == 2
+
+    # edit one file, delete the other, while the API is failing deletes
+    (folder / "a.md").write_text("alpha, revised", encoding="utf-8")
+    (folder / "b.md").unlink()
+    client.fail_deletes = True
+    counts = _sync(client, folder, db)
+    assert counts["pending_delete"] == 2
+    assert len(client.store) == 3  # new a.md plus the stale a.md and b.md
+
+    client.fail_deletes = False
+    counts = _sync(client, folder, db)
+    assert counts["pending_delete"] == 0
+    assert len(client.store) == 1
+    assert client.uploaded == client.store
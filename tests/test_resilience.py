@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import resilience
+
+
+class _HTTPError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def _failing(calls: list, exc: Exception):
+    def fn():
+        calls.append(1)
+        raise exc
+    return fn
+
+
+def test_breaker_opens_short_circuits_and_recovers():
+    resilience.configure("t.breaker", retries=0, failure_threshold=2, reset_after=0.05, fallback="down")
+    calls = []
+
+    async def main():
+        for _ in range(2):
+            with pytest.raises(ConnectionError):
+                await resilience.call("t.breaker", _failing(calls, ConnectionError()))
+        with pytest.raises(resilience.CircuitOpenError) as err:
+            await resilience.call("t.breaker", lambda: "never")
+        assert err.value.fallback == "down"
+        assert resilience.endpoint_stats("t.breaker")["state"] == "open"
+
+        await asyncio.sleep(0.06)
+        return await resilience.call("t.breaker", lambda: "ok")  # half-open probe
+
+    assert asyncio.run(main()) == "ok"
+    assert len(calls) == 2
+    assert resilience.endpoint_stats("t.breaker")["state"] == "closed"
+
+
+def test_cancelled_half_open_probe_is_released():
+    resilience.configure("t.probe", retries=0, failure_threshold=1, reset_after=0.02)
+
+    async def main():
+        with pytest.raises(ConnectionError):
+            await resilience.call("t.probe", _failing([], ConnectionError()))
+        await asyncio.sleep(0.03)
+        probe = asyncio.ensure_future(resilience.call("t.probe", time.sleep, 0.2))
+        await asyncio.sleep(0.02)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        return await resilience.call("t.probe", lambda: "ok")
+
+    assert asyncio.run(main()) == "ok"
+
+
+def test_client_errors_are_not_retried_or_counted():
+    resilience.configure("t.4xx", retries=2, backoff=0, failure_threshold=1)
+    calls = []
+
+    async def main():
+        for _ in range(3):
+            with pytest.raises(_HTTPError):
+                await resilience.call("t.4xx", _failing(calls, _HTTPError(404)))
+
+    asyncio.run(main())
+    assert len(calls) == 3  # one attempt each, no retries
+    assert resilience.endpoint_stats("t.4xx")["state"] == "closed"
+
+
+def test_transient_errors_are_retried():
+    resilience.configure("t.retry", retries=2, backoff=0, retry_on=(ConnectionError,))
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError()
+        return "ok"
+
+    assert asyncio.run(resilience.call("t.retry", flaky)) == "ok"
+    assert resilience.endpoint_stats("t.retry")["retries"] == 2
+
+
+def test_slow_call_is_hedged():
+    resilience.configure("t.hedge", timeout=2.0, retries=0, hedge_percentile=0.9, hedge_min_samples=5)
+    lock = threading.Lock()
+    started = []
+
+    def fn(slow_first: bool):
+        with lock:
+            started.append(1)
+            n = len(started)
+        time.sleep(1.0 if slow_first and n == 1 else 0.01)
+        return n
+
+    async def main():
+        for _ in range(5):
+            await resilience.call("t.hedge", fn, False)  # latency history ~10ms
+        started.clear()
+        t0 = time.monotonic()
+        winner = await resilience.call("t.hedge", fn, True)
+        return winner, time.monotonic() - t0
+
+    winner, elapsed = asyncio.run(main())
+    assert winner == 2  # the duplicate answered first
+    assert elapsed < 0.5
+    assert resilience.endpoint_stats("t.hedge")["hedges"] == 1
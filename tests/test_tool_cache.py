@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+import tool_cache
+
+
+def _upstream(calls: list, result: str = "answer", delay: float = 0.05):
+    async def factory():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return result
+    return factory
+
+
+def test_concurrent_identical_calls_share_one_upstream_request():
+    calls = []
+
+    async def main():
+        a, b = tool_cache.SessionMemo(), tool_cache.SessionMemo()
+        return await asyncio.gather(
+            a.run("web_search", "RAG news", _upstream(calls)),
+            b.run("web_search", "  rag NEWS ", _upstream(calls)),
+        ), a, b
+
+    (r1, r2), a, b = asyncio.run(main())
+    assert (r1, r2) == ("answer", "answer")
+    assert len(calls) == 1
+    assert a.stats["upstream"] + b.stats["upstream"] == 1
+    assert a.stats["coalesced"] + b.stats["coalesced"] == 1
+
+
+def test_cancelled_waiter_does_not_cancel_the_others():
+    calls = []
+
+    async def main():
+        memo = tool_cache.SessionMemo()
+        first = asyncio.ensure_future(memo.run("file_search", "q", _upstream(calls, delay=0.1)))
+        second = asyncio.ensure_future(memo.run("file_search", "q", _upstream(calls, delay=0.1)))
+        await asyncio.sleep(0.02)
+        first.cancel()
+        return await second, first
+
+    result, first = asyncio.run(main())
+    assert result == "answer"
+    assert first.cancelled()
+    assert len(calls) == 1
+
+
+def test_memo_hits_expire_and_evict():
+    calls = []
+
+    async def main():
+        memo = tool_cache.SessionMemo(ttl=0.05, max_entries=2)
+        await memo.run("web_search", "a", _upstream(calls, delay=0))
+        await memo.run("web_search", "a", _upstream(calls, delay=0))
+        assert memo.stats["memo_hits"] == 1
+        await asyncio.sleep(0.06)
+        await memo.run("web_search", "a", _upstream(calls, delay=0))  # expired -> upstream
+        await memo.run("web_search", "b", _upstream(calls, delay=0))
+        await memo.run("web_search", "c", _upstream(calls, delay=0))  # evicts "a"
+        return memo
+
+    memo = asyncio.run(main())
+    assert len(calls) == 4
+    assert memo.get("web_search", "a") is None
+    assert memo.get("web_search", "c") == "answer"
+
+
+def test_empty_results_are_not_memoized():
+    calls = []
+
+    async def main():
+        memo = tool_cache.SessionMemo()
+        await memo.run("web_search", "q", _upstream(calls, result="", delay=0))
+        await memo.run("web_search", "q", _upstream(calls, result="", delay=0))
+
+    asyncio.run(main())
+    assert len(calls) == 2
+
+
+def test_context_skips_oversized_blocks_and_keeps_older_ones():
+    memo = tool_cache.SessionMemo()
+    memo.put("file_search", "embeddings", "short answer")
+    time.sleep(0.001)
+    memo.put("web_search", "news", "x" * 10_000)
+    assert memo.context(max_chars=500) == "[file_search] embeddings\nshort answer"
@@ -0,0 +1,99 @@
+# tool_cache.py
+# Per-session memo of tool results + in-flight coalescing of identical tool calls
+# across sessions running on the same worker event loop.
+import asyncio
+import time
+from collections import OrderedDict
+
+# Worker-wide counters (all sessions in this process).
+STATS = {"upstream_calls": 0, "coalesced": 0, "memo_hits": 0}
+
+_INFLIGHT: dict = {}
+
+
+def _forget(key, task: asyncio.Task):
+    if _INFLIGHT.get(key) is task:
+        del _INFLIGHT[key]
+    if not task.cancelled():
+        task.exception()  # mark retrieved; waiters already got it
+
+async def coalesce(key, factory):
+    """
+    Await `factory()` once per key: concurrent callers with the same key share the
+    in-flight task instead of issuing their own upstream request.
+    """
+    key = (id(asyncio.get_running_loop()), key)
+    task = _INFLIGHT.get(key)
+    if task is not None:
+        STATS["coalesced"] += 1
+        return await asyncio.shield(task), True
+
+    STATS["upstream_calls"] += 1
+    task = asyncio.ensure_future(factory())
+    _INFLIGHT[key] = task
+    task.add_done_callback(lambda t: _forget(key, t))
+    # shield: one caller barging in (turn interrupted) must not cancel the others
+    return await asyncio.shield(task), False
+
+
+class SessionMemo:
+    """Tool results for one voice session, keyed by (tool, normalized query, scope)."""
+
+    def __init__(self, ttl: float = 900.0, max_entries: int = 64):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.stats = {"calls": 0, "memo_hits": 0, "coalesced": 0, "upstream": 0}
+
+    @staticmethod
+    def _key(tool: str, query: str, scope: str = "") -> tuple:
+        return (tool, " ".join((query or "").lower().split()), scope)
+
+    def get(self, tool: str, query: str, scope: str = ""):
+        key = self._key(tool, query, scope)
+        hit = self._entries.get(key)
+        if hit is None:
+            return None
+        stored_at, _, result = hit
+        if time.monotonic() - stored_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def put(self, tool: str, query: str, result: str, scope: str = ""):
+        key = self._key(tool, query, scope)
+        self._entries[key] = (time.monotonic(), query, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def run(self, tool: str, query: str, factory, scope: str = "") -> str:
+        """Memo hit, else join an identical in-flight call, else go upstream; non-empty results are memoized."""
+        self.stats["calls"] += 1
+        cached = self.get(tool, query, scope)
+        if cached is not None:
+            self.stats["memo_hits"] += 1
+            STATS["memo_hits"] += 1
+            return cached
+
+        result, shared = await coalesce(self._key(tool, query, scope), factory)
+        self.stats["coalesced" if shared else "upstream"] += 1
+        if result:
+            # a blank answer isn't worth repeating for the whole TTL
+            self.put(tool, query, result, scope)
+        return result
+
+    def context(self, max_chars: int = 6000) -> str:
+        """Most recent results first, as a block a research prompt can reuse."""
+        now = time.monotonic()
+        parts, used = [], 0
+        for (tool, _, _), (stored_at, query, result) in reversed(self._entries.items()):
+            if now - stored_at > self.ttl or not result:
+                continue
+            block = f"[{tool}] {query}\n{result.strip()}"
+            if used + len(block) > max_chars:
+                continue  # one long result shouldn't crowd out older, shorter ones
+            parts.append(block)
+            used += len(block)
+        return "\n\n".join(parts)